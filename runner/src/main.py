@@ -1,23 +1,45 @@
 import asyncio
-import json
+import logging
 import os
 import time
-from typing import Optional, Dict, Any, Tuple
+from collections import deque
+from typing import Optional, Dict, Any, List, Tuple
 from job_processor import JobProcessor
 from dotenv import load_dotenv
 
+import aiohttp
 import boto3
+import orjson
 from botocore.config import Config
 
 load_dotenv()
 
+logging.basicConfig(
+    level=os.getenv("LOG_LEVEL", "INFO").upper(),
+    format="%(asctime)s %(name)s %(levelname)s %(message)s"
+)
+log = logging.getLogger("codevox.runner")
+
 class SQSRunner:
     def __init__(self):
-        self.processor = JobProcessor()
+        # One pooled HTTP session shared by callbacks and GitHub API calls
+        self.http = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=50, limit_per_host=20, keepalive_timeout=75)
+        )
+        self.processor = JobProcessor(self.http)
         self.mock_mode = os.getenv("SQS_ENABLED", "false").lower() != "true"
         self.running = False
+        # Cap on jobs processed concurrently
+        self.max_concurrency = int(os.getenv("RUNNER_CONCURRENCY", "10"))
+        self.slots = asyncio.Semaphore(self.max_concurrency)
+        # After the first free slot, how long to wait for more so receives stay batched under load
+        self.receive_batch_window = float(os.getenv("SQS_RECEIVE_BATCH_WINDOW", "2"))
+        self.tasks = set()
+        # Received messages start with a short visibility timeout that a heartbeat keeps extending
+        self.visibility_timeout = int(os.getenv("SQS_VISIBILITY_TIMEOUT", "30"))
+        self.heartbeat_interval = self.visibility_timeout * 2 / 3
         # Mock queue (only used when mock_mode is True)
-        self.mock_jobs = []
+        self.mock_jobs = deque()
 
         # Real SQS client when enabled
         if not self.mock_mode:
@@ -30,85 +52,171 @@ class SQSRunner:
                 region_name=region,
                 config=Config(retries={"max_attempts": 3})
             )
-            print(f"🔗 [RUNNER] Connected to SQS: {self.queue_url}")
+            log.info("🔗 Connected to SQS: %s", self.queue_url)
         else:
             self.sqs = None
 
     def add_mock_job(self, job_data: Dict[str, Any]):
         """Add a job to mock queue (for testing)"""
-        print(f"📥 [RUNNER] Received job: {job_data['job_id']}")
+        log.info("📥 Received job: %s", job_data["job_id"])
         self.mock_jobs.append(job_data)
 
-    async def poll_sqs(self) -> Optional[Tuple[Dict[str, Any], Optional[str]]]:
-        """Poll for a job. Returns (job_data, receipt_handle) or None."""
+    async def poll_sqs(self, max_messages: int = 10) -> List[Tuple[Dict[str, Any], Optional[str]]]:
+        """Poll for up to max_messages jobs. Returns a list of (job_data, receipt_handle)."""
         if self.mock_mode:
-            if self.mock_jobs:
-                return self.mock_jobs.pop(0), None
-            return None
+            batch = []
+            while self.mock_jobs and len(batch) < max_messages:
+                batch.append((self.mock_jobs.popleft(), None))
+            return batch
 
         try:
-            resp = self.sqs.receive_message(
+            resp = await asyncio.to_thread(
+                self.sqs.receive_message,
                 QueueUrl=self.queue_url,
-                MaxNumberOfMessages=1,
+                MaxNumberOfMessages=min(max_messages, 10),  # SQS caps a receive at 10
                 WaitTimeSeconds=10,     # long polling
-                VisibilityTimeout=60    # time to process before message reappears
+                VisibilityTimeout=self.visibility_timeout  # extended by a heartbeat while processing
             )
-            messages = resp.get("Messages", [])
-            if not messages:
-                return None
-
-            msg = messages[0]
-            body = msg.get("Body", "{}")
-            job_data = json.loads(body)
-            receipt = msg.get("ReceiptHandle")
-            return job_data, receipt
         except Exception as e:
-            print(f"❌ [RUNNER] SQS receive error: {e}")
+            log.error("❌ SQS receive error: %s", e)
             await asyncio.sleep(5)
-            return None
+            return []
+
+        batch = []
+        for msg in resp.get("Messages", []):
+            try:
+                job_data = orjson.loads(msg.get("Body", "{}"))
+            except ValueError as e:
+                log.error("❌ Skipping malformed message: %s", e)
+                continue
+            batch.append((job_data, msg.get("ReceiptHandle")))
+        return batch
     
+    async def _handle_job(self, job_data: Dict[str, Any]) -> bool:
+        """Process a job and send its callback. Returns True if the callback succeeded."""
+        try:
+            log.debug("📋 Processing job %s", job_data["job_id"])
+
+            # Process the job
+            result = await self.processor.process_job(job_data)
+
+            # Send results back to API
+            callback_success = await self.processor.send_callback(result)
+
+            if callback_success:
+                log.info("✅ Job %s completed successfully", job_data["job_id"])
+            else:
+                log.error("❌ Job %s failed to send callback", job_data["job_id"])
+            return callback_success
+        except Exception as e:
+            log.error("❌ Error: %s", e)
+            return False
+        finally:
+            self.slots.release()
+
+    async def _extend_visibility(self, receipt: str):
+        """Keep a message hidden from other consumers until cancelled"""
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            try:
+                await asyncio.to_thread(
+                    self.sqs.change_message_visibility,
+                    QueueUrl=self.queue_url,
+                    ReceiptHandle=receipt,
+                    VisibilityTimeout=self.visibility_timeout
+                )
+            except Exception as e:
+                log.warning("⚠️ Failed to extend message visibility: %s", e)
+
+    async def _handle_batch(self, batch: List[Tuple[Dict[str, Any], Optional[str]]]):
+        """Process a received batch concurrently, then delete completed messages in one call"""
+        # Heartbeats run until the batch is deleted so slow jobs are not redelivered mid-run
+        heartbeats = [
+            asyncio.create_task(self._extend_visibility(receipt))
+            for _, receipt in batch
+            if not self.mock_mode and receipt
+        ]
+        try:
+            results = await asyncio.gather(*[self._handle_job(job_data) for job_data, _ in batch])
+
+            # Delete messages if using real SQS
+            receipts = [receipt for (_, receipt), ok in zip(batch, results) if ok and receipt]
+            if self.mock_mode or not receipts:
+                return
+            try:
+                resp = await asyncio.to_thread(
+                    self.sqs.delete_message_batch,
+                    QueueUrl=self.queue_url,
+                    Entries=[{"Id": str(i), "ReceiptHandle": r} for i, r in enumerate(receipts)]
+                )
+                log.debug("🗑️ Deleted %d message(s)", len(resp.get("Successful", [])))
+                for failed in resp.get("Failed", []):
+                    log.warning("⚠️ Failed to delete message: %s", failed.get("Message"))
+            except Exception as e:
+                log.warning("⚠️ Failed to delete messages: %s", e)
+        finally:
+            for heartbeat in heartbeats:
+                heartbeat.cancel()
+
+    async def _acquire_slots(self) -> int:
+        """Wait for a free job slot, then collect more for up to receive_batch_window so one receive fills them"""
+        await self.slots.acquire()
+        acquired = 1
+        target = min(10, self.max_concurrency)  # SQS caps a receive at 10
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.receive_batch_window
+        while acquired < target:
+            if self.slots.locked():
+                # Slots free up one job at a time under a steady backlog; wait briefly for more
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    await asyncio.wait_for(self.slots.acquire(), timeout)
+                except asyncio.TimeoutError:
+                    break
+            else:
+                await self.slots.acquire()
+            acquired += 1
+        return acquired
+
     async def run(self):
         """Main runner loop"""
-        print("🚀 [RUNNER] Starting CodeVox runner...")
-        print("🔄 [RUNNER] Polling for jobs...")
+        log.info("🚀 Starting CodeVox runner...")
+        log.info("🔄 Polling for jobs...")
         
         self.running = True
         
-        while self.running:
-            try:
-                polled = await self.poll_sqs()
-                if polled:
-                    job_data, receipt = polled
-                    print(f"📋 [RUNNER] Processing job {job_data['job_id']}")
+        try:
+            while self.running:
+                try:
+                    # Only receive as many jobs as there are free slots
+                    slots = await self._acquire_slots()
+                    batch = await self.poll_sqs(slots)
+                    for _ in range(slots - len(batch)):
+                        self.slots.release()
 
-                    # Process the job
-                    result = await self.processor.process_job(job_data)
-                    
-                    # Send results back to API
-                    callback_success = await self.processor.send_callback(result)
-                    
-                    if callback_success:
-                        print(f"✅ [RUNNER] Job {job_data['job_id']} completed successfully")
-                        # Delete message if using real SQS
-                        if not self.mock_mode and receipt:
-                            try:
-                                self.sqs.delete_message(QueueUrl=self.queue_url, ReceiptHandle=receipt)
-                                print(f"🗑️  [RUNNER] Deleted message for job {job_data['job_id']}")
-                            except Exception as e:
-                                print(f"⚠️ [RUNNER] Failed to delete message: {e}")
+                    if batch:
+                        # Hand the batch off and go straight back to polling
+                        task = asyncio.create_task(self._handle_batch(batch))
+                        self.tasks.add(task)
+                        task.add_done_callback(self.tasks.discard)
                     else:
-                        print(f"❌ [RUNNER] Job {job_data['job_id']} failed to send callback")
-                else:
-                    # No jobs available, wait before polling again
-                    await asyncio.sleep(5)
+                        # No jobs available, wait before polling again
+                        await asyncio.sleep(5)
                     
-            except KeyboardInterrupt:
-                print("\n🛑 [RUNNER] Shutting down...")
-                self.running = False
-                break
-            except Exception as e:
-                print(f"❌ [RUNNER] Error: {e}")
-                await asyncio.sleep(10)  # Wait before retrying
+                except KeyboardInterrupt:
+                    log.info("🛑 Shutting down...")
+                    self.running = False
+                    break
+                except Exception as e:
+                    log.error("❌ Error: %s", e)
+                    await asyncio.sleep(10)  # Wait before retrying
+        finally:
+            # Also reached when asyncio.run cancels the loop on Ctrl+C
+            await asyncio.gather(*self.tasks, return_exceptions=True)
+            self.processor.close()
+            await self.http.close()
 
 # Test runner with mock job
 async def main():